@@ -0,0 +1,169 @@
+# approximateQ.py
+#
+# The learning side of ApproximateQAgent in sampleAgents.py: features,
+# weights, the Q-learning update and parallel training. Needs NumPy.
+#
+# Q(s, a) is a weighted sum of features of the position that move a takes
+# Pacman to. Features for all the legal moves are computed together as one
+# array from the api percepts, so choosing a move is a single small
+# matrix-vector product.
+#
+# Training plays many games without graphics across a pool of processes.
+# Each worker learns from its own games, starting from the shared weights,
+# and after every round the workers' weights are averaged. To train:
+#
+#   python approximateQ.py -l smallClassic -r 10 -e 20 -o qweights.npy
+#
+# and then play with the result:
+#
+#   python pacman.py -p ApproximateQAgent -a weights=qweights.npy -l smallClassic
+
+import random
+import numpy
+
+FEATURES = ['bias', 'food-distance', 'eats-food', 'ghost-danger',
+            'ghost-closeness', 'capsule-distance', 'eats-capsule', 'exits']
+
+# The (dx, dy) step for each move, as in game.Actions.
+STEPS = {'North': (0, 1), 'South': (0, -1), 'East': (1, 0), 'West': (-1, 0), 'Stop': (0, 0)}
+NEIGHBOURS = numpy.array([(0, 1), (0, -1), (1, 0), (-1, 0)])
+
+# Weights for an agent that has learnt nothing yet.
+def initialWeights():
+    return numpy.zeros(len(FEATURES))
+
+# Weights are saved as a .npy file of float32s, one per feature.
+def saveWeights(weights, path):
+    numpy.save(path, numpy.asarray(weights, dtype=numpy.float32))
+
+def loadWeights(path):
+    weights = numpy.load(path).astype(numpy.float64)
+    if weights.shape != (len(FEATURES),):
+        raise ValueError("%s does not hold %d weights" % (path, len(FEATURES)))
+    return weights
+
+# A boolean array that is True at each wall, from api.walls(state).
+def wallGrid(walls):
+    walls = numpy.array(walls, dtype=int)
+    grid = numpy.zeros(tuple(walls.max(axis=0) + 1), dtype=bool)
+    grid[walls[:, 0], walls[:, 1]] = True
+    return grid
+
+# Smallest manhattan distance from each of positions to any of targets,
+# or None if there are no targets.
+def nearest(positions, targets):
+    if not len(targets):
+        return None
+    targets = numpy.array(targets, dtype=float)
+    distances = numpy.abs(positions[:, None, :] - targets[None, :, :]).sum(axis=2)
+    return distances.min(axis=1)
+
+# The features of each move in legal, as an array with one row per move
+# and one column per entry of FEATURES. The other arguments are the api
+# percepts, with walls as a wallGrid.
+def features(pacman, legal, food, ghosts, capsules, walls):
+    positions = numpy.array([STEPS[move] for move in legal], dtype=float) + pacman
+    scale = float(sum(walls.shape))
+    result = numpy.zeros((len(legal), len(FEATURES)))
+    result[:, 0] = 1.0
+
+    food_distance = nearest(positions, food)
+    if food_distance is not None:
+        result[:, 1] = food_distance / scale
+        result[:, 2] = food_distance == 0
+
+    ghost_distance = nearest(positions, ghosts)
+    if ghost_distance is not None:
+        # Ghosts within a step of where each move leads
+        ghosts = numpy.array(ghosts, dtype=float)
+        close = numpy.abs(positions[:, None, :] - ghosts[None, :, :]).sum(axis=2) <= 1
+        result[:, 3] = close.sum(axis=1)
+        result[:, 4] = 1.0 / (1.0 + ghost_distance)
+        # Eating food next to a ghost is not worth it
+        result[:, 2] *= result[:, 3] == 0
+
+    capsule_distance = nearest(positions, capsules)
+    if capsule_distance is not None:
+        result[:, 5] = capsule_distance / scale
+        result[:, 6] = capsule_distance == 0
+
+    # How many ways there are out of where each move leads
+    cells = positions.astype(int)[:, None, :] + NEIGHBOURS[None, :, :]
+    result[:, 7] = (~walls[cells[:, :, 0], cells[:, :, 1]]).sum(axis=1) / 4.0
+    return result
+
+# Move weights towards target for the move with features row.
+def update(weights, row, target, alpha):
+    return weights + alpha * (target - row.dot(weights)) * row
+
+# Play episodes games of layoutName headless, learning as they go. Runs in
+# a worker process; job is a tuple so that it can go through Pool.map.
+# Returns the learnt weights and the score of each game.
+def runEpisodes(job):
+    layoutName, weights, episodes, seed, alpha, epsilon, gamma = job
+    # These need the rest of the pacman code, so only load them here
+    import ghostAgents
+    import layout
+    import pacman
+    import textDisplay
+    from sampleAgents import ApproximateQAgent
+
+    random.seed(seed)
+    board = layout.getLayout(layoutName)
+    agent = ApproximateQAgent(alpha=alpha, epsilon=epsilon, gamma=gamma)
+    agent.weights = weights.copy()
+    ghosts = [ghostAgents.RandomGhost(i + 1) for i in range(board.getNumGhosts())]
+    # Counting every game as training keeps the games quiet
+    pacman.runGames(board, agent, ghosts, textDisplay.NullGraphics(),
+                    episodes, False, numTraining=episodes)
+    return agent.weights, agent.scores
+
+# Train weights on layoutName over a pool of worker processes. Each round,
+# every worker plays episodes games from the current weights and the
+# results are averaged.
+def train(layoutName, rounds, episodes, workers, alpha=0.2, epsilon=0.05, gamma=0.8,
+          weights=None):
+    from multiprocessing import Pool
+
+    if weights is None:
+        weights = initialWeights()
+    pool = Pool(workers)
+    try:
+        for i in range(rounds):
+            jobs = [(layoutName, weights, episodes, random.random(), alpha, epsilon, gamma)
+                    for worker in range(workers)]
+            results = pool.map(runEpisodes, jobs)
+            weights = numpy.mean([result[0] for result in results], axis=0)
+            scores = [score for result in results for score in result[1]]
+            print("Round %d: average score %.1f over %d games" %
+                  (i + 1, numpy.mean(scores), len(scores)))
+    finally:
+        pool.close()
+        pool.join()
+    return weights
+
+if __name__ == '__main__':
+    from multiprocessing import cpu_count
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="python approximateQ.py -l LAYOUT -o FILE")
+    parser.add_option('-l', '--layout', dest='layout', default='smallClassic',
+                      help='the layout to train on')
+    parser.add_option('-r', '--rounds', dest='rounds', type='int', default=10,
+                      help='how many times to average the weights')
+    parser.add_option('-e', '--episodes', dest='episodes', type='int', default=20,
+                      help='games per worker per round')
+    parser.add_option('-w', '--workers', dest='workers', type='int', default=cpu_count(),
+                      help='number of worker processes')
+    parser.add_option('-i', '--input', dest='input', default=None,
+                      help='weights to carry on training from')
+    parser.add_option('-o', '--output', dest='output', default='qweights.npy',
+                      help='where to save the weights')
+    options, args = parser.parse_args()
+
+    start = loadWeights(options.input) if options.input else None
+    weights = train(options.layout, options.rounds, options.episodes, options.workers,
+                    weights=start)
+    saveWeights(weights, options.output)
+    for name, weight in zip(FEATURES, weights):
+        print("%-18s %8.3f" % (name, weight))
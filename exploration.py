@@ -0,0 +1,149 @@
+# exploration.py
+#
+# Keeping track of which parts of the maze Pacman has seen, for agents
+# that can only sense food close by.
+#
+# Heading for fixed corners, as the CornerSeeking agents do, covers a map
+# slowly and only by accident. Instead, FrontierMap keeps the frontier: the
+# open cells that have not been seen yet but are next to ones that have.
+# Going to the nearest frontier cell always uncovers something new.
+#
+# Both parts are incremental. Seeing a cell only touches that cell and its
+# neighbours. The nearest frontier cell is first looked for by a
+# breadth-first search out from Pacman that gives up after a few steps, so
+# it only covers the area around Pacman. Only when nothing is that close
+# is the whole grid searched, and the way found is then followed on later
+# ticks rather than searched for again.
+
+from collections import deque
+
+from mazeDistances import MazeDistances
+
+# FrontierMap
+#
+# The cells seen so far and the frontier around them.
+class FrontierMap:
+
+    # Constructor
+    #
+    # distances is a MazeDistances (or a list of wall positions, from
+    # api.walls(state)); it is only used for its neighbours. radius is how
+    # many steps away from Pacman cells count as seen, and limit how many
+    # steps out nearestFrontier looks before searching the whole grid.
+    def __init__(self, distances, radius=1, limit=10):
+        if not hasattr(distances, 'neighbours'):
+            distances = MazeDistances(distances)
+        self.distances = distances
+        self.radius = radius
+        self.limit = limit
+        self.seen = set()
+        self.frontier = set()
+        # The way to a far frontier cell, from the next step to the cell
+        # itself, as found by the last search of the whole grid
+        self.route = []
+
+    # Is there anywhere left to explore?
+    def explored(self):
+        return not self.frontier
+
+    # Mark a cell as seen and push the frontier out past it.
+    def see(self, cell):
+        if cell in self.seen:
+            return
+        self.seen.add(cell)
+        self.frontier.discard(cell)
+        for next_cell in self.distances.neighbours(cell):
+            if next_cell not in self.seen:
+                self.frontier.add(next_cell)
+
+    # Record what Pacman can see from position: every cell within radius
+    # steps, plus any other cells known to be visible, such as those in
+    # api.food(state).
+    def observe(self, position, visible=()):
+        position = (int(position[0]), int(position[1]))
+        depth = {position: 0}
+        queue = deque([position])
+        while queue:
+            cell = queue.popleft()
+            self.see(cell)
+            if depth[cell] < self.radius:
+                for next_cell in self.distances.neighbours(cell):
+                    if next_cell not in depth:
+                        depth[next_cell] = depth[cell] + 1
+                        queue.append(next_cell)
+        for cell in visible:
+            self.see((int(cell[0]), int(cell[1])))
+
+    # Breadth-first search from position to the nearest cell in goals,
+    # giving up after limit steps if a limit is given. Returns the way
+    # there, from the first step to the goal itself, or None if nothing was
+    # found.
+    def search(self, position, goals, limit=None):
+        position = (int(position[0]), int(position[1]))
+        if position in goals:
+            return []
+        # For each cell reached, its distance and the cell it was reached from
+        reached = {position: (0, None)}
+        queue = deque([position])
+        while queue:
+            cell = queue.popleft()
+            distance = reached[cell][0]
+            if limit is not None and distance >= limit:
+                break
+            for next_cell in self.distances.neighbours(cell):
+                if next_cell in reached:
+                    continue
+                if next_cell in goals:
+                    path = [next_cell]
+                    while cell != position:
+                        path.append(cell)
+                        cell = reached[cell][1]
+                    path.reverse()
+                    return path
+                reached[next_cell] = (distance + 1, cell)
+                queue.append(next_cell)
+        return None
+
+    # The nearest cell in goals to position, as for search. Returns the
+    # cell, its maze distance and the first cell on the way there, or None
+    # if nothing was found.
+    def nearest(self, position, goals, limit=None):
+        path = self.search(position, goals, limit)
+        if path is None:
+            return None
+        if not path:
+            position = (int(position[0]), int(position[1]))
+            return position, 0, position
+        return path[-1], len(path), path[0]
+
+    # The nearest frontier cell to position, as for nearest.
+    #
+    # Only the cells within limit steps (self.limit if not given) are
+    # searched each tick. If there is no frontier that close, and Pacman
+    # has taken the next step of the route found on an earlier tick to a
+    # frontier cell that is still unseen, the rest of that route is used.
+    # Otherwise the whole grid is searched and the route kept. Far from
+    # the frontier this is one bounded search a tick, not a full one, at
+    # the cost of sticking with a far cell that may no longer be the
+    # nearest one.
+    def nearestFrontier(self, position, limit=None):
+        if not self.frontier:
+            self.route = []
+            return None
+        position = (int(position[0]), int(position[1]))
+        if limit is None:
+            limit = self.limit
+        found = self.nearest(position, self.frontier, limit)
+        if found is not None:
+            self.route = []
+            return found
+        if self.route and self.route[0] == position:
+            self.route.pop(0)
+            if self.route and self.route[-1] in self.frontier:
+                return self.route[-1], len(self.route), self.route[0]
+        path = self.search(position, self.frontier)
+        if not path:
+            self.route = []
+            return None
+        self.route = path
+        return path[-1], len(path), path[0]
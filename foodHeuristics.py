@@ -0,0 +1,225 @@
+# foodHeuristics.py
+#
+# A lower bound on the number of moves Pacman needs to clear the food,
+# for use by anything that plans towards eating everything (the goal of
+# HungryAgent).
+#
+# The bound is the weight of a minimum spanning tree over the remaining
+# food plus Pacman's position, with edges weighted by maze distance. Any
+# path that starts at Pacman and visits every pellet connects all of those
+# points, so it can never be shorter than the tree.
+#
+# Rebuilding the tree from scratch every tick is wasteful, since food only
+# ever changes a pellet at a time. FoodMST keeps the tree for the current
+# food and patches it when pellets are eaten (or come into view), and
+# remembers the trees for the food sets it was asked about most recently.
+# A search that asks about a food set it has not seen, normally its
+# parent's food less one pellet, gets a tree patched from the remembered
+# neighbouring set rather than one built from scratch.
+
+from collections import OrderedDict
+from layoutTables import distancesFor
+
+# UnionFind
+#
+# Disjoint sets over arbitrary hashable items, for Kruskal's algorithm.
+class UnionFind:
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while root != self.parent[root]:
+            root = self.parent[root]
+        # Compress the path behind us
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    # Join the sets holding a and b. Returns False if they were already
+    # in the same set.
+    def union(self, a, b):
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return False
+        self.parent[root_a] = root_b
+        return True
+
+# Run Kruskal's algorithm over a list of (distance, a, b) edges, returning
+# the edges kept.
+def kruskal(edges):
+    sets = UnionFind()
+    tree = []
+    for edge in sorted(edges):
+        if sets.union(edge[1], edge[2]):
+            tree.append(edge)
+    return tree
+
+# FoodMST
+#
+# A minimum spanning tree over a set of food pellets. A tree is held as a
+# list of (distance, a, b) edges, and trees are memoized by the frozenset
+# of food they span. Only the memo_size most recently used trees are kept,
+# so a long search cannot fill memory with them.
+class FoodMST:
+
+    # Constructor
+    #
+    # distances is anything with a distance(a, b) method, normally a
+    # MazeDistances. A list of wall positions is also accepted, in which
+    # case the shared layout tables are used if they have been built (see
+    # layoutTables.py).
+    def __init__(self, distances, memo_size=10000):
+        if not hasattr(distances, 'distance'):
+            distances = distancesFor(distances)
+        self.distances = distances
+        self.memo_size = memo_size
+        # The food currently spanned, and the tree over it
+        self.food = frozenset()
+        self.tree = []
+        # Map from a frozenset of food to the tree over it, least recently
+        # used first
+        self.memo = OrderedDict()
+        self.remember(self.food, self.tree)
+
+    # Total weight of a tree.
+    def weight(self, tree):
+        return sum([edge[0] for edge in tree])
+
+    # The memoized tree over food, or None. A hit moves food to the back
+    # of the eviction queue.
+    def recall(self, food):
+        tree = self.memo.pop(food, None)
+        if tree is not None:
+            self.memo[food] = tree
+        return tree
+
+    # Memoize tree as the tree over food, evicting the least recently
+    # used trees once there are more than memo_size.
+    def remember(self, food, tree):
+        self.memo.pop(food, None)
+        self.memo[food] = tree
+        while len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+
+    # The tree over food. Comes from the memo if this set has been seen
+    # before. Otherwise it is patched from a remembered set one pellet
+    # away: food plus a pellet that has since been eaten (eaten is a hint
+    # for which one, normally Pacman's position) or food less one pellet.
+    # Only when there is no such set is it built from scratch with Prim's
+    # algorithm.
+    def treeFor(self, food, eaten=None):
+        food = frozenset(food)
+        tree = self.recall(food)
+        if tree is not None:
+            return tree
+        candidates = set(self.food - food)
+        if eaten is not None and eaten not in food:
+            candidates.add(eaten)
+        for pellet in candidates:
+            parent = self.recall(food | frozenset([pellet]))
+            if parent is not None:
+                tree = self.remove(parent, food, pellet)
+                break
+        else:
+            for pellet in food:
+                child = self.recall(food - frozenset([pellet]))
+                if child is not None:
+                    tree = self.insert(child, food - frozenset([pellet]), pellet)
+                    break
+            else:
+                tree = self.prim(food)
+        self.remember(food, tree)
+        return tree
+
+    # Move the current tree on to a new food set, normally
+    # api.food(state). Eaten pellets are cut out of the tree and newly
+    # seen ones are added to it, rather than rebuilding. Returns the
+    # weight of the new tree.
+    def update(self, food):
+        food = frozenset(food)
+        tree = self.recall(food)
+        if tree is None:
+            tree = self.tree
+            nodes = set(self.food)
+            for pellet in self.food - food:
+                nodes.discard(pellet)
+                tree = self.remove(tree, nodes, pellet)
+            for pellet in food - self.food:
+                tree = self.insert(tree, nodes, pellet)
+                nodes.add(pellet)
+            self.remember(food, tree)
+        self.food = food
+        self.tree = tree
+        return self.weight(tree)
+
+    # Lower bound on the moves needed to eat all of food starting from
+    # position: the weight of the tree over food plus position. In a
+    # search, position is usually where a pellet was just eaten, so the
+    # tree over food is patched from the one over food plus position.
+    def heuristic(self, position, food):
+        food = frozenset(food)
+        if not food:
+            return 0
+        if position in food:
+            return self.weight(self.treeFor(food))
+        tree = self.treeFor(food, position)
+        return self.weight(self.insert(tree, food, position))
+
+    # Build the tree over food from scratch.
+    def prim(self, food):
+        food = list(food)
+        if not food:
+            return []
+        # For each cell not yet in the tree, its cheapest edge into it
+        best = {}
+        for pellet in food[1:]:
+            best[pellet] = (self.distances.distance(food[0], pellet), food[0], pellet)
+        tree = []
+        while best:
+            edge = min(best.values())
+            added = edge[2]
+            del best[added]
+            tree.append(edge)
+            for pellet in best:
+                d = self.distances.distance(added, pellet)
+                if d < best[pellet][0]:
+                    best[pellet] = (d, added, pellet)
+        return tree
+
+    # Add cell to a tree over nodes. The new tree only ever uses the old
+    # tree edges plus edges out of cell, so this is one Kruskal pass over
+    # about twice as many edges as there are nodes.
+    def insert(self, tree, nodes, cell):
+        edges = list(tree)
+        for node in nodes:
+            edges.append((self.distances.distance(cell, node), cell, node))
+        return kruskal(edges)
+
+    # Cut cell out of a tree, where nodes is what is left once it has
+    # gone. The remaining edges split into one piece per edge that cell
+    # had, and the pieces are joined back up using the cheapest edge
+    # between each pair of them.
+    def remove(self, tree, nodes, cell):
+        kept = [edge for edge in tree if cell != edge[1] and cell != edge[2]]
+        if len(kept) == len(tree) - 1:
+            # cell was a leaf, so the rest of the tree is still minimal
+            return kept
+        sets = UnionFind()
+        for edge in kept:
+            sets.union(edge[1], edge[2])
+        pieces = {}
+        for node in nodes:
+            pieces.setdefault(sets.find(node), []).append(node)
+        pieces = list(pieces.values())
+        # Cheapest edge between each pair of pieces, labelled by the pair
+        # so that Kruskal joins pieces rather than single cells
+        bridges = {}
+        for i in range(len(pieces)):
+            for j in range(i + 1, len(pieces)):
+                bridges[(i, j)] = min([(self.distances.distance(a, b), a, b)
+                                       for a in pieces[i] for b in pieces[j]])
+        joins = kruskal([(edge[0], i, j) for (i, j), edge in bridges.items()])
+        return kept + [bridges[(i, j)] for d, i, j in joins]
@@ -0,0 +1,230 @@
+# layoutTables.py
+#
+# Per-layout tables built once and shared, read-only, by every process
+# that plays on that layout.
+#
+# Everything derived from api.walls and api.corners -- which cells are
+# open, the neighbours of each one and the maze distance between every
+# pair -- is the same for every game on a layout, but without this each
+# process works it out again for itself. Instead, build the tables once:
+#
+#   python layoutTables.py -l bigMaze -d /dev/shm/pacman
+#
+# and point the agents at that directory:
+#
+#   PACMAN_LAYOUT_TABLES=/dev/shm/pacman python pacman.py -p FoodClearingAgent -l bigMaze
+#
+# The file is memory-mapped read-only and looked up in place, so nothing
+# is copied into the process and every process on the machine shares the
+# one copy through the page cache. Putting it under /dev/shm keeps it in
+# shared memory rather than on disk.
+#
+# LayoutTables has the same distance and neighbours methods as
+# MazeDistances, so it can be used anywhere one is. It pays off where
+# distances are needed between many pairs of cells, as in FoodMST, which
+# would otherwise run a search out of every pellet in every process.
+# distancesFor hands back whichever is available. Reading a cell's
+# neighbours from the file is slower than working them out from the
+# walls, so FrontierMap, which only ever wants neighbours, is better off
+# with a MazeDistances.
+
+import mmap
+import os
+import struct
+import zlib
+
+from mazeDistances import MazeDistances, STEPS
+
+# Header, then the corners, then for each cell of the grid its index among
+# the open cells (-1 for walls), then the position of each open cell, then
+# the index of each open cell's neighbours (-1 for none), then the
+# distance between each pair of open cells.
+MAGIC = b'PMLT'
+VERSION = 1
+HEADER = struct.Struct('<4sBHHII')
+CORNER = struct.Struct('<HH')
+INDEX = struct.Struct('<i')
+CELL = struct.Struct('<HH')
+NEIGHBOURS = struct.Struct('<4i')
+DISTANCE = struct.Struct('<H')
+# Distance stored for cells that cannot reach each other
+UNREACHABLE = 0xffff
+
+# Where tablesFor looks for tables, if it is not told.
+DIRECTORY = 'PACMAN_LAYOUT_TABLES'
+
+# A checksum of the walls, so that tables are only ever used on the
+# layout they were built for.
+def wallsChecksum(walls):
+    return zlib.crc32(repr(sorted(walls)).encode('ascii')) & 0xffffffff
+
+# The corners of a layout, as api.corners(state) gives them.
+def layoutCorners(width, height):
+    return [(0, 0), (width - 1, 0), (0, height - 1), (width - 1, height - 1)]
+
+# The file a layout's tables are kept in within directory.
+def tablePath(directory, walls):
+    return os.path.join(directory, '%08x.plt' % wallsChecksum(walls))
+
+# Build the tables for a layout and write them to path. walls is a list of
+# wall positions, as from api.walls(state). Returns the number of open
+# cells.
+#
+# The tables are written to a temporary file next to path and only renamed
+# into place once complete, so a process starting up meanwhile never sees
+# a half-written file.
+def build(walls, path):
+    walls = list(walls)
+    width = max([wall[0] for wall in walls]) + 1
+    height = max([wall[1] for wall in walls]) + 1
+    distances = MazeDistances(walls)
+    cells = [(x, y) for x in range(width) for y in range(height)
+             if distances.isOpen((x, y))]
+    if len(cells) >= UNREACHABLE:
+        raise ValueError("Layout is too big for a table")
+    index = dict([(cell, i) for i, cell in enumerate(cells)])
+
+    partial = '%s.%d.tmp' % (path, os.getpid())
+    out = open(partial, 'wb')
+    out.write(HEADER.pack(MAGIC, VERSION, width, height, len(cells), wallsChecksum(walls)))
+    for corner in layoutCorners(width, height):
+        out.write(CORNER.pack(*corner))
+    out.write(struct.pack('<%di' % (width * height),
+                          *[index.get((x, y), -1) for x in range(width) for y in range(height)]))
+    for cell in cells:
+        out.write(CELL.pack(*cell))
+    for x, y in cells:
+        out.write(NEIGHBOURS.pack(*[index.get((x + dx, y + dy), -1) for dx, dy in STEPS]))
+    # One row of distances at a time, so the whole matrix is never held
+    for cell in cells:
+        row = [UNREACHABLE] * len(cells)
+        for other, distance in distances.fromSource(cell).items():
+            row[index[other]] = distance
+        out.write(struct.pack('<%dH' % len(cells), *row))
+        # Nothing will ask for these searches again
+        distances.cache.clear()
+    out.close()
+    os.rename(partial, path)
+    return len(cells)
+
+# LayoutTables
+#
+# The tables for one layout, memory-mapped read-only from a file written
+# by build.
+class LayoutTables:
+
+    def __init__(self, path):
+        table = open(path, 'rb')
+        self.data = mmap.mmap(table.fileno(), 0, access=mmap.ACCESS_READ)
+        table.close()
+        if len(self.data) < HEADER.size:
+            raise ValueError("%s is not a layout table" % path)
+        magic, version, self.width, self.height, self.count, self.checksum = \
+            HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a layout table" % path)
+        self.corners = [CORNER.unpack_from(self.data, HEADER.size + i * CORNER.size)
+                        for i in range(4)]
+        # Where each table starts in the file
+        self.indices = HEADER.size + 4 * CORNER.size
+        self.cells = self.indices + self.width * self.height * INDEX.size
+        self.neighbourLists = self.cells + self.count * CELL.size
+        self.distances = self.neighbourLists + self.count * NEIGHBOURS.size
+        if len(self.data) < self.distances + self.count * self.count * DISTANCE.size:
+            raise ValueError("%s is cut short" % path)
+
+    # Were these tables built for a layout with these walls?
+    def matches(self, walls):
+        return wallsChecksum(walls) == self.checksum
+
+    # The index of an open cell, or -1 for a wall or a cell off the grid.
+    def index(self, position):
+        x, y = int(position[0]), int(position[1])
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return -1
+        return INDEX.unpack_from(self.data, self.indices + (x * self.height + y) * INDEX.size)[0]
+
+    # The position of the open cell with index i.
+    def cell(self, i):
+        return CELL.unpack_from(self.data, self.cells + i * CELL.size)
+
+    # Is the cell at position open (i.e. not a wall)?
+    def isOpen(self, position):
+        return self.index(position) >= 0
+
+    # The open cells next to position.
+    def neighbours(self, position):
+        i = self.index(position)
+        if i < 0:
+            return []
+        return [self.cell(j) for j in
+                NEIGHBOURS.unpack_from(self.data, self.neighbourLists + i * NEIGHBOURS.size)
+                if j >= 0]
+
+    # Maze distance between a and b. Cells that cannot reach each other,
+    # or that are walls, are an infinite distance apart.
+    def distance(self, a, b):
+        i = self.index(a)
+        j = self.index(b)
+        if i < 0 or j < 0:
+            return float('inf')
+        distance = DISTANCE.unpack_from(self.data,
+                                        self.distances + (i * self.count + j) * DISTANCE.size)[0]
+        if distance == UNREACHABLE:
+            return float('inf')
+        return distance
+
+# Tables already attached by this process, by path.
+attached = {}
+
+# Attach to the tables in path, or return the ones already attached.
+def attach(path):
+    if path not in attached:
+        attached[path] = LayoutTables(path)
+    return attached[path]
+
+# The shared tables for a layout, if some have been built for it in
+# directory (by default, the one named by $PACMAN_LAYOUT_TABLES), or None.
+# Tables that cannot be read are treated as not being there.
+def tablesFor(walls, directory=None):
+    if directory is None:
+        directory = os.environ.get(DIRECTORY)
+    if directory:
+        path = tablePath(directory, walls)
+        if os.path.exists(path):
+            try:
+                tables = attach(path)
+            except (EnvironmentError, ValueError, struct.error):
+                return None
+            if tables.matches(walls):
+                return tables
+    return None
+
+# Maze distances for a layout: the shared tables if there are any,
+# otherwise a fresh MazeDistances.
+def distancesFor(walls, directory=None):
+    tables = tablesFor(walls, directory)
+    if tables is not None:
+        return tables
+    return MazeDistances(walls)
+
+if __name__ == '__main__':
+    from optparse import OptionParser
+    import layout
+
+    parser = OptionParser(usage="python layoutTables.py -l LAYOUT -d DIRECTORY")
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='the layout to build tables for')
+    parser.add_option('-d', '--directory', dest='directory', default='.',
+                      help='where to put the tables')
+    options, args = parser.parse_args()
+
+    board = layout.getLayout(options.layout)
+    if board is None:
+        raise Exception("The layout " + options.layout + " cannot be found")
+    if not os.path.isdir(options.directory):
+        os.makedirs(options.directory)
+    walls = board.walls.asList()
+    path = tablePath(options.directory, walls)
+    count = build(walls, path)
+    print("Wrote tables for %d cells to %s" % (count, path))
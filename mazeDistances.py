@@ -0,0 +1,66 @@
+# mazeDistances.py
+#
+# True distances through the maze, as opposed to the manhattan distances
+# used by the agents in sampleAgents.py.
+#
+# The only thing needed is the list of wall positions that api.walls()
+# hands back. Distances are found by breadth-first search and every search
+# is cached by its source cell, so once a cell has been searched from,
+# any distance out of it is a dictionary lookup.
+
+from collections import deque
+
+# The four moves Pacman can make, as (dx, dy) steps.
+STEPS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+# MazeDistances
+#
+# Holds the walls of a layout and a cache of breadth-first searches over
+# the open cells.
+class MazeDistances:
+
+    # Constructor
+    #
+    # walls is a list of (x, y) wall positions, as from api.walls(state).
+    def __init__(self, walls):
+        self.walls = set(walls)
+        # Map from source cell to a dictionary of distances from it
+        self.cache = {}
+
+    # Is the cell at position open (i.e. not a wall)?
+    def isOpen(self, position):
+        return position not in self.walls
+
+    # The open cells next to position.
+    def neighbours(self, position):
+        x, y = position
+        return [(x + dx, y + dy) for dx, dy in STEPS
+                if (x + dx, y + dy) not in self.walls]
+
+    # Distances from source to every open cell that can be reached from
+    # it. The search is only ever run once per source.
+    def fromSource(self, source):
+        source = (int(source[0]), int(source[1]))
+        if source in self.cache:
+            return self.cache[source]
+        distances = {source: 0}
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            step = distances[cell] + 1
+            for next_cell in self.neighbours(cell):
+                if next_cell not in distances:
+                    distances[next_cell] = step
+                    queue.append(next_cell)
+        self.cache[source] = distances
+        return distances
+
+    # Maze distance between a and b. Reuses a search out of either end if
+    # one has already been done. Cells that cannot reach each other are
+    # an infinite distance apart.
+    def distance(self, a, b):
+        a = (int(a[0]), int(a[1]))
+        b = (int(b[0]), int(b[1]))
+        if a not in self.cache and b in self.cache:
+            a, b = b, a
+        return self.fromSource(a).get(b, float('inf'))
@@ -0,0 +1,128 @@
+# perceptStream.py
+#
+# A compact stream of what Pacman can sense, one line per tick.
+#
+# The walls never change during a game and the food changes by at most a
+# pellet a move, so printing everything every tick (as SensingAgent used
+# to) is mostly repetition. Instead, the first line of a game is a full
+# frame and every line after it only holds what changed since the line
+# before. Each line is a JSON object:
+#
+#   full frame:  {"w": walls, "f": food, "c": capsules, "p": pacman,
+#                 "g": ghosts, "l": legal}
+#   delta:       any of
+#                 "p"  Pacman's new position
+#                 "f-" food that has gone    "f+" food that has appeared
+#                 "c-" capsules that have gone  "c+" capsules that have appeared
+#                 "g"  [index, x, y] for each ghost that moved
+#                 "gn" the number of ghosts, if it changed
+#                 "l"  the legal moves, if they changed
+#
+# A tick where nothing changed is just {}. PerceptState rebuilds the full
+# picture from the lines, so anything downstream can follow a game without
+# it ever being printed in full more than once.
+
+import json
+
+# PerceptEncoder
+#
+# Writes percepts to a file-like object as full frames and deltas.
+class PerceptEncoder:
+
+    def __init__(self, out):
+        self.out = out
+        # What was last sent, or None if the next line must be a full frame
+        self.last = None
+
+    # Make the next line a full frame, e.g. at the start of a new game.
+    def reset(self):
+        self.last = None
+
+    # Send one tick's worth of percepts, as given by api.walls, api.food,
+    # api.capsules, api.whereAmI, api.ghosts and api.legalActions.
+    def write(self, walls, food, capsules, pacman, ghosts, legal):
+        current = {'f': set(food), 'c': set(capsules), 'p': tuple(pacman),
+                   'g': [tuple(ghost) for ghost in ghosts], 'l': list(legal)}
+        if self.last is None:
+            record = {'w': sorted(walls), 'f': sorted(current['f']),
+                      'c': sorted(current['c']), 'p': current['p'],
+                      'g': current['g'], 'l': current['l']}
+        else:
+            record = self.delta(self.last, current)
+        self.last = current
+        self.out.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self.out.flush()
+
+    # The changes from last to current.
+    def delta(self, last, current):
+        record = {}
+        if current['p'] != last['p']:
+            record['p'] = current['p']
+        for key in ['f', 'c']:
+            gone = last[key] - current[key]
+            new = current[key] - last[key]
+            if gone:
+                record[key + '-'] = sorted(gone)
+            if new:
+                record[key + '+'] = sorted(new)
+        moved = [[i, ghost[0], ghost[1]] for i, ghost in enumerate(current['g'])
+                 if i >= len(last['g']) or ghost != last['g'][i]]
+        if moved:
+            record['g'] = moved
+        if len(current['g']) != len(last['g']):
+            record['gn'] = len(current['g'])
+        if current['l'] != last['l']:
+            record['l'] = current['l']
+        return record
+
+# PerceptState
+#
+# Rebuilds the percepts from the lines a PerceptEncoder wrote.
+class PerceptState:
+
+    def __init__(self):
+        self.walls = set()
+        self.food = set()
+        self.capsules = set()
+        self.pacman = None
+        self.ghosts = []
+        self.legal = []
+
+    # Apply one line of the stream. Returns self so that this can be used
+    # as state = state.update(line).
+    def update(self, line):
+        record = json.loads(line)
+        if 'w' in record:
+            self.walls = set(map(tuple, record['w']))
+            self.food = set(map(tuple, record['f']))
+            self.capsules = set(map(tuple, record['c']))
+            self.pacman = tuple(record['p'])
+            self.ghosts = [tuple(ghost) for ghost in record['g']]
+            self.legal = record['l']
+            return self
+
+        if 'p' in record:
+            self.pacman = tuple(record['p'])
+        self.food.difference_update(map(tuple, record.get('f-', [])))
+        self.food.update(map(tuple, record.get('f+', [])))
+        self.capsules.difference_update(map(tuple, record.get('c-', [])))
+        self.capsules.update(map(tuple, record.get('c+', [])))
+        if 'gn' in record:
+            del self.ghosts[record['gn']:]
+        for i, x, y in record.get('g', []):
+            if i < len(self.ghosts):
+                self.ghosts[i] = (x, y)
+            else:
+                self.ghosts.append((x, y))
+        if 'l' in record:
+            self.legal = record['l']
+        return self
+
+# Follow a stream, yielding the rebuilt percepts after every line. The same
+# PerceptState is yielded each time, updated in place.
+def readPercepts(lines):
+    state = PerceptState()
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield state.update(line)
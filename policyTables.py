@@ -0,0 +1,291 @@
+# policyTables.py
+#
+# Compiled lookup tables for agents whose choice of move depends only on
+# where Pacman is and a small amount of internal state, like WestAgent and
+# CornerSeekingAgentNoFood in sampleAgents.py.
+#
+# For a fixed layout, the compiler walks every (position, internal state)
+# pair the agent can reach from the start and records, for each one, the
+# moves the agent would pick between and the internal state it would move
+# on to. Only those pairs are written, to a compact binary file, which the
+# compiled agents memory-map so that each decision is a few reads.
+#
+# To build a table, run this file from the pacman directory, e.g.:
+#
+#   python policyTables.py -l mediumClassic -a WestAgent -o west.ppt
+#
+# and then play with it:
+#
+#   python pacman.py -p CompiledWestAgent -a table=west.ppt -l mediumClassic
+
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+
+from game import Directions
+from layoutTables import layoutCorners, wallsChecksum
+
+# The file starts with a header, then the corners. There is then one entry
+# for each (position, internal state) pair the compiler reached, sorted by
+# cell and then by state, and for each cell of the grid the index of its
+# first entry (with one more at the end, so that a cell's entries run up
+# to the next cell's first). The entries are stored as three arrays: the
+# internal state as an unsigned short, the next internal state as an
+# unsigned short, and a one byte mask of the moves to pick between.
+MAGIC = b'PMPT'
+VERSION = 2
+HEADER = struct.Struct('<4sBHHHIBI')
+CORNER = struct.Struct('<HH')
+OFFSET = struct.Struct('<I')
+STATE = struct.Struct('<H')
+NEXT = struct.Struct('<H')
+MASK = struct.Struct('<B')
+
+# Moves in the order the game lists legal actions, with the step each one
+# takes and its bit in an entry's mask.
+MOVES = [(Directions.NORTH, (0, 1)),
+         (Directions.SOUTH, (0, -1)),
+         (Directions.EAST, (1, 0)),
+         (Directions.WEST, (-1, 0)),
+         (Directions.STOP, (0, 0))]
+BITS = dict([(move[0], 1 << i) for i, move in enumerate(MOVES)])
+# Set in an entry's mask if the agent picks between the moves at random.
+# Otherwise there is only one move, and the agent takes it without drawing
+# a random number, so that with a fixed seed the game plays out just as it
+# would with the original agent.
+RANDOM = 1 << 7
+
+# Write an array to out in little-endian order, as struct would.
+def writeArray(out, values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    values.tofile(out)
+
+# Where a move from position leads.
+def nextPosition(position, direction):
+    for move, (dx, dy) in MOVES:
+        if move == direction:
+            return (position[0] + dx, position[1] + dy)
+    return position
+
+# The legal moves from position, in the same order as
+# api.legalActions(state) would give them.
+def legalMoves(walls, position):
+    return [move for move, step in MOVES
+            if nextPosition(position, move) not in walls]
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+# WestPolicy
+#
+# The decisions of WestAgent, which has no internal state.
+class WestPolicy:
+
+    def __init__(self, corners):
+        self.numStates = 1
+
+    def initialState(self):
+        return 0
+
+    # Returns the moves to pick between, the next internal state and
+    # whether the pick is made at random.
+    def step(self, index, position, legal):
+        legal = [move for move in legal if move != Directions.STOP]
+        if Directions.WEST in legal:
+            return [Directions.WEST], 0, False
+        up_down_moves = [move for move in [Directions.NORTH, Directions.SOUTH] if move in legal]
+        if up_down_moves:
+            return up_down_moves, 0, True
+        return legal, 0, True
+
+# CornerSeekingNoFoodPolicy
+#
+# The decisions of CornerSeekingAgentNoFood. Its internal state is how
+# many corners it has reached, its last move and how many times in a row
+# it has made that move, packed into a single index.
+class CornerSeekingNoFoodPolicy:
+
+    # Possible last moves; None before the first move.
+    LAST = [None, Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+    # move_attempts never goes above this
+    ATTEMPTS = 12
+
+    def __init__(self, corners):
+        self.corners = list(corners)
+        self.numStates = (len(self.corners) + 1) * len(self.LAST) * self.ATTEMPTS
+
+    def encode(self, reached, last, attempts):
+        return (reached * len(self.LAST) + self.LAST.index(last)) * self.ATTEMPTS + attempts
+
+    def decode(self, index):
+        rest, attempts = divmod(index, self.ATTEMPTS)
+        reached, last = divmod(rest, len(self.LAST))
+        return reached, self.LAST[last], attempts
+
+    def initialState(self):
+        return self.encode(0, None, 0)
+
+    # Returns the moves to pick between, the next internal state and
+    # whether the pick is made at random, or None once every corner has
+    # been reached.
+    def step(self, index, position, legal):
+        reached, last, attempts = self.decode(index)
+        if reached < len(self.corners) and position == self.corners[reached]:
+            reached += 1
+            attempts = 0
+        if reached == len(self.corners):
+            return None
+        legal = [move for move in legal if move != Directions.STOP]
+        if attempts > 10:
+            return legal, self.encode(reached, last, 0), True
+        target = self.corners[reached]
+        best = min(legal, key=lambda move: manhattan(nextPosition(position, move), target))
+        if best == last:
+            attempts += 1
+        else:
+            attempts = 0
+        return [best], self.encode(reached, best, attempts), False
+
+# The agents that can be compiled, by the name of the agent they copy.
+POLICIES = {
+    'WestAgent': WestPolicy,
+    'CornerSeekingAgentNoFood': CornerSeekingNoFoodPolicy,
+}
+
+# Compile a policy for a layout and write the table to path.
+#
+# walls is a list of wall positions, width and height the size of the
+# layout, and starts the positions Pacman can start from. Returns the
+# number of (position, internal state) pairs that were reached.
+def compilePolicy(name, walls, width, height, starts, path):
+    walls = set(walls)
+    corners = layoutCorners(width, height)
+    policy = POLICIES[name](corners)
+    # Map from (cell, internal state) to (mask, next internal state), for
+    # the pairs the agent makes a decision at
+    entries = {}
+
+    # Breadth-first search over the (position, state) pairs the agent can
+    # get to, following every move it might pick.
+    seen = set()
+    queue = deque()
+    for start in starts:
+        pair = ((int(start[0]), int(start[1])), policy.initialState())
+        seen.add(pair)
+        queue.append(pair)
+    while queue:
+        position, index = queue.popleft()
+        decision = policy.step(index, position, legalMoves(walls, position))
+        if decision is None:
+            continue
+        choices, next_index, randomly = decision
+        mask = 0
+        for move in choices:
+            mask |= BITS[move]
+        if randomly:
+            mask |= RANDOM
+        entries[(position[0] * height + position[1], index)] = (mask, next_index)
+        for move in choices:
+            pair = (nextPosition(position, move), next_index)
+            if pair not in seen:
+                seen.add(pair)
+                queue.append(pair)
+
+    keys = sorted(entries)
+    offsets = array('I', [0] * (width * height + 1))
+    for cell, index in keys:
+        offsets[cell + 1] += 1
+    for cell in range(width * height):
+        offsets[cell + 1] += offsets[cell]
+
+    out = open(path, 'wb')
+    out.write(HEADER.pack(MAGIC, VERSION, width, height, policy.numStates,
+                          wallsChecksum(walls), len(corners), len(keys)))
+    for corner in corners:
+        out.write(CORNER.pack(*corner))
+    writeArray(out, offsets)
+    writeArray(out, array('H', [key[1] for key in keys]))
+    writeArray(out, array('H', [entries[key][1] for key in keys]))
+    writeArray(out, array('B', [entries[key][0] for key in keys]))
+    out.close()
+    return len(seen)
+
+# PolicyTable
+#
+# A compiled table, memory-mapped read-only.
+class PolicyTable:
+
+    def __init__(self, path):
+        table = open(path, 'rb')
+        self.data = mmap.mmap(table.fileno(), 0, access=mmap.ACCESS_READ)
+        table.close()
+        if len(self.data) < HEADER.size:
+            raise ValueError("%s is not a policy table" % path)
+        magic, version, self.width, self.height, self.numStates, self.checksum, count, \
+            self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a policy table" % path)
+        # Where each part of the file starts
+        self.offsets = HEADER.size + count * CORNER.size
+        self.states = self.offsets + (self.width * self.height + 1) * OFFSET.size
+        self.nexts = self.states + self.count * STATE.size
+        self.masks = self.nexts + self.count * NEXT.size
+        if len(self.data) < self.masks + self.count * MASK.size:
+            raise ValueError("%s is cut short" % path)
+        self.corners = [CORNER.unpack_from(self.data, HEADER.size + i * CORNER.size)
+                        for i in range(count)]
+
+    # Was this table compiled for a layout with these walls and corners?
+    def matches(self, walls, corners):
+        return (wallsChecksum(walls) == self.checksum and
+                [tuple(corner) for corner in corners] == self.corners)
+
+    # The moves to pick between, the next internal state and whether to
+    # pick between the moves at random, or None if the compiler never
+    # reached this position and state.
+    def lookup(self, position, index):
+        x, y = position
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        cell = x * self.height + y
+        low = OFFSET.unpack_from(self.data, self.offsets + cell * OFFSET.size)[0]
+        end = OFFSET.unpack_from(self.data, self.offsets + (cell + 1) * OFFSET.size)[0]
+        # Binary search of the cell's entries, which are sorted by state
+        high = end
+        while low < high:
+            middle = (low + high) // 2
+            if STATE.unpack_from(self.data, self.states + middle * STATE.size)[0] < index:
+                low = middle + 1
+            else:
+                high = middle
+        if low == end or STATE.unpack_from(self.data, self.states + low * STATE.size)[0] != index:
+            return None
+        mask = MASK.unpack_from(self.data, self.masks + low * MASK.size)[0]
+        choices = [move for move, step in MOVES if mask & BITS[move]]
+        next_index = NEXT.unpack_from(self.data, self.nexts + low * NEXT.size)[0]
+        return choices, next_index, bool(mask & RANDOM)
+
+if __name__ == '__main__':
+    from optparse import OptionParser
+    import layout
+
+    parser = OptionParser(usage="python policyTables.py -l LAYOUT -a AGENT -o FILE")
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='the layout to compile for')
+    parser.add_option('-a', '--agent', dest='agent', default='WestAgent',
+                      help='one of: ' + ', '.join(sorted(POLICIES)))
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='where to write the table (default AGENT.ppt)')
+    options, args = parser.parse_args()
+
+    board = layout.getLayout(options.layout)
+    if board is None:
+        raise Exception("The layout " + options.layout + " cannot be found")
+    starts = [position for isPacman, position in board.agentPositions if isPacman]
+    output = options.output or options.agent + '.ppt'
+    reached = compilePolicy(options.agent, board.walls.asList(), board.width,
+                            board.height, starts, output)
+    print("Wrote %d states to %s" % (reached, output))
@@ -30,8 +30,19 @@ from pacman import Directions
 from game import Agent
 import api
 import random
+import sys
 import game
 import util
+import exploration
+import foodHeuristics
+import perceptStream
+import policyTables
+
+# ApproximateQAgent needs NumPy, which the other agents do not.
+try:
+    import approximateQ
+except ImportError:
+    approximateQ = None
 
 # RandomAgent
 #
@@ -77,45 +88,45 @@ class RandomishAgent(Agent):
 
 # SensingAgent
 #
-# Doesn't move, but reports sensory data available to Pacman
+# Doesn't move, but reports sensory data available to Pacman.
+#
+# Rather than printing everything on every tick, the percepts go out as a
+# stream (see perceptStream.py): the full layout once at the start of each
+# game, then only what changed. By default this goes to the screen; use
+# -a stream=FILE to write it to a file instead.
 class SensingAgent(Agent):
 
+    def __init__(self, stream=None):
+        self.stream = stream
+        if stream is None:
+            self.percepts = perceptStream.PerceptEncoder(sys.stdout)
+        else:
+            self.percepts = perceptStream.PerceptEncoder(open(stream, 'w'))
+
+    # Called at the start of each game, so that the next percepts are sent
+    # in full. A file closed at the end of the last game is reopened and
+    # added to.
+    def registerInitialState(self, state):
+        if self.percepts.out.closed:
+            self.percepts.out = open(self.stream, 'a')
+        self.percepts.reset()
+
+    # Called at the end of each game. Closes the file the stream is going
+    # to, if the agent opened one, so that it is complete on disk.
+    def final(self, state):
+        if self.stream is not None:
+            self.percepts.out.close()
+
     def getAction(self, state):
 
         # Demonstrates the information that Pacman can access about the state
-        # of the game.
-
-        # What are the current moves available
+        # of the game: the legal moves, where Pacman and the ghosts are, and
+        # where the capsules, food and walls are. Distances to the ghosts
+        # can be worked out from the positions at the other end.
         legal = api.legalActions(state)
-        print "Legal moves: ", legal
-
-        # Where is Pacman?
-        pacman = api.whereAmI(state)
-        print "Pacman position: ", pacman
-
-        # Where are the ghosts?
-        print "Ghost positions:"
-        theGhosts = api.ghosts(state)
-        for i in range(len(theGhosts)):
-            print theGhosts[i]
-
-        # How far away are the ghosts?
-        print "Distance to ghosts:"
-        for i in range(len(theGhosts)):
-            print util.manhattanDistance(pacman,theGhosts[i])
-
-        # Where are the capsules?
-        print "Capsule locations:"
-        print api.capsules(state)
-        
-        # Where is the food?
-        print "Food locations: "
-        print api.food(state)
+        self.percepts.write(api.walls(state), api.food(state), api.capsules(state),
+                            api.whereAmI(state), api.ghosts(state), legal)
 
-        # Where are the walls?
-        print "Wall locations: "
-        print api.walls(state)
-        
         # getAction has to return a move. Here we pass "STOP" to the
         # API to ask Pacman to stay where they are.
         return api.makeMove(Directions.STOP, legal)
@@ -783,3 +794,272 @@ class CornerSeekingAgentAvoidGhostStates(Agent):
                     return move[1]
 
 
+
+# CompiledWestAgent
+#
+# WestAgent, but reading its moves from a table built for this layout by
+# policyTables.py. Falls back to WestAgent if the table is missing, was
+# built for a different layout, or has no entry for where Pacman is.
+class CompiledWestAgent(WestAgent):
+
+    def __init__(self, table='WestAgent.ppt'):
+        WestAgent.__init__(self)
+        try:
+            self.table = policyTables.PolicyTable(table)
+        except (EnvironmentError, ValueError):
+            print("Cannot read policy table " + table + ", not using it")
+            self.table = None
+        self.checked = False
+
+    def getAction(self, state):
+        # The first time round, make sure the table is for this layout
+        if not self.checked and self.table is not None:
+            self.checked = True
+            if not self.table.matches(api.walls(state), api.corners(state)):
+                print("Policy table does not match this layout, not using it")
+                self.table = None
+
+        if self.table is not None:
+            decision = self.table.lookup(api.whereAmI(state), 0)
+            if decision:
+                choices, next_index, randomly = decision
+                legal = api.legalActions(state)
+                if Directions.STOP in legal:
+                    legal.remove(Directions.STOP)
+                # Only draw a random number where WestAgent would
+                if randomly:
+                    return api.makeMove(random.choice(choices), legal)
+                return api.makeMove(choices[0], legal)
+
+        return WestAgent.getAction(self, state)
+
+# CompiledCornerSeekingAgentNoFood
+#
+# CornerSeekingAgentNoFood, reading its moves from a compiled table. The
+# table also gives the agent's next internal state, which is unpacked back
+# into the usual attributes so that falling back to
+# CornerSeekingAgentNoFood carries on seamlessly. A missing or unreadable
+# table means it plays as CornerSeekingAgentNoFood throughout.
+class CompiledCornerSeekingAgentNoFood(CornerSeekingAgentNoFood):
+
+    def __init__(self, table='CornerSeekingAgentNoFood.ppt'):
+        CornerSeekingAgentNoFood.__init__(self)
+        try:
+            self.table = policyTables.PolicyTable(table)
+        except (EnvironmentError, ValueError):
+            print("Cannot read policy table " + table + ", not using it")
+            self.table = None
+        if self.table is not None:
+            self.policy = policyTables.CornerSeekingNoFoodPolicy(self.table.corners)
+        self.checked = False
+
+    def getAction(self, state):
+        # The first time round, make sure the table is for this layout
+        if not self.checked and self.table is not None:
+            self.checked = True
+            if not self.table.matches(api.walls(state), api.corners(state)):
+                print("Policy table does not match this layout, not using it")
+                self.table = None
+
+        if self.table is not None:
+            corners = self.table.corners
+            reached = 0
+            if self.all_corners is not None:
+                reached = len(corners) - len(self.all_corners)
+            index = self.policy.encode(reached, self.last_move, self.move_attempts)
+            decision = self.table.lookup(api.whereAmI(state), index)
+            if decision:
+                choices, next_index, randomly = decision
+                reached, self.last_move, self.move_attempts = self.policy.decode(next_index)
+                self.all_corners = list(corners[reached:])
+                self.visited_corners = set(corners[:reached])
+                self.target_corner = corners[reached]
+                legal = api.legalActions(state)
+                if Directions.STOP in legal:
+                    legal.remove(Directions.STOP)
+                if randomly:
+                    return api.makeMove(random.choice(choices), legal)
+                return api.makeMove(choices[0], legal)
+
+        return CornerSeekingAgentNoFood.getAction(self, state)
+
+# ApproximateQAgent
+#
+# Picks the legal move with the highest Q-value, where Q is a weighted sum
+# of features of the position the move leads to (see approximateQ.py).
+# Run it with weights trained by approximateQ.py:
+#
+#   python pacman.py -p ApproximateQAgent -a weights=qweights.npy
+#
+# With alpha above zero it also learns as it plays, from the change in
+# score after each move.
+class ApproximateQAgent(Agent):
+
+    def __init__(self, weights=None, alpha=0.0, epsilon=0.0, gamma=0.8):
+        if approximateQ is None:
+            raise ImportError("ApproximateQAgent needs NumPy")
+        if weights is None:
+            self.weights = approximateQ.initialWeights()
+        else:
+            self.weights = approximateQ.loadWeights(weights)
+        self.alpha = float(alpha)
+        self.epsilon = float(epsilon)
+        self.gamma = float(gamma)
+        # Final score of each game played
+        self.scores = []
+        self.walls = None
+        # Features of the last move made, and the score when it was made
+        self.last = None
+
+    def registerInitialState(self, state):
+        self.walls = None
+        self.last = None
+
+    def getAction(self, state):
+        # The walls never change, so only turn them into a grid once a game
+        if self.walls is None:
+            self.walls = approximateQ.wallGrid(api.walls(state))
+
+        legal = api.legalActions(state)
+        if Directions.STOP in legal:
+            legal.remove(Directions.STOP)
+
+        features = approximateQ.features(api.whereAmI(state), legal, api.food(state),
+                                         api.ghosts(state), api.capsules(state), self.walls)
+        values = features.dot(self.weights)
+
+        # Learn from what happened after the last move
+        if self.alpha and self.last is not None:
+            reward = state.getScore() - self.last[1]
+            target = reward + self.gamma * values.max()
+            self.weights = approximateQ.update(self.weights, self.last[0], target, self.alpha)
+
+        if random.random() < self.epsilon:
+            pick = random.randrange(len(legal))
+        else:
+            pick = int(values.argmax())
+        self.last = (features[pick], state.getScore())
+        return api.makeMove(legal[pick], legal)
+
+    # Called at the end of each game.
+    def final(self, state):
+        if self.alpha and self.last is not None:
+            reward = state.getScore() - self.last[1]
+            self.weights = approximateQ.update(self.weights, self.last[0], reward, self.alpha)
+        self.last = None
+        self.scores.append(state.getScore())
+
+# FrontierSeekingAgent
+#
+# Explores the maze rather than heading for the corners. Eats any food it
+# can see, nearest first, and otherwise goes to the nearest cell it has
+# not seen yet (see exploration.py). Use -a radius=N to say how many steps
+# away Pacman counts cells as seen, and -a limit=N how far it looks for
+# unseen cells each tick before searching the whole maze.
+class FrontierSeekingAgent(Agent):
+
+    def __init__(self, radius=1, limit=10):
+        self.radius = int(radius)
+        self.limit = int(limit)
+        self.frontier = None
+
+    # Called at the start of each game, so that the map is started afresh.
+    def registerInitialState(self, state):
+        self.frontier = None
+
+    def getAction(self, state):
+        # The walls never change, so only set up the map once a game
+        if self.frontier is None:
+            walls = api.walls(state)
+            self.frontier = exploration.FrontierMap(walls, self.radius, self.limit)
+
+        pacman_pos = api.whereAmI(state)
+        food_positions = api.food(state)
+        self.frontier.observe(pacman_pos, food_positions)
+
+        legal = api.legalActions(state)
+        if Directions.STOP in legal:
+            legal.remove(Directions.STOP)
+
+        # Food in sight comes first, otherwise the nearest unseen cell
+        found = None
+        if food_positions:
+            found = self.frontier.nearest(pacman_pos, set(food_positions))
+        if found is None:
+            found = self.frontier.nearestFrontier(pacman_pos)
+
+        # Take the first step of the way there
+        if found is not None:
+            for direction in legal:
+                if getNextPosition(pacman_pos, direction) == found[2]:
+                    return api.makeMove(direction, legal)
+
+        # Everything has been seen and eaten, so just wander
+        return api.makeMove(random.choice(legal), legal)
+
+# FoodClearingAgent
+#
+# Sets out to eat all the food in as few moves as it can, ignoring the
+# ghosts. It keeps a minimum spanning tree over the food, by maze distance
+# (see foodHeuristics.py), and heads for the end of one of its branches:
+# the one for which the maze distance to it, plus the weight of the tree
+# without it (a lower bound on the moves needed to clear the rest of the
+# food), is smallest. Pellets in the middle of the tree get eaten on the
+# way between the ends.
+#
+# The estimate for the chosen pellet drops by one with every step towards
+# it, and none of the others can drop by more, so there is no need to look
+# again until the food changes; the pellet is kept until then.
+#
+# The maze distances come from the shared layout tables if they have been
+# built for this layout (see layoutTables.py), so the agent starts without
+# working them out for itself.
+class FoodClearingAgent(Agent):
+
+    def __init__(self):
+        self.mst = None
+        self.target = None
+
+    # Called at the start of each game, since the layout may have changed.
+    def registerInitialState(self, state):
+        self.mst = None
+        self.target = None
+
+    def getAction(self, state):
+        # The walls never change, so only set up the tree once a game
+        if self.mst is None:
+            self.mst = foodHeuristics.FoodMST(api.walls(state))
+
+        pacman_pos = api.whereAmI(state)
+        food = frozenset(api.food(state))
+
+        legal = api.legalActions(state)
+        if Directions.STOP in legal:
+            legal.remove(Directions.STOP)
+        if not food:
+            return api.makeMove(random.choice(legal), legal)
+
+        distances = self.mst.distances
+        if food != self.mst.food:
+            # Patch the tree for the pellets eaten since it was last looked at
+            self.mst.update(food)
+            # Cutting off the end of a branch leaves the rest of the tree
+            # minimal, so the bound for it is the tree less its one edge
+            weight = self.mst.weight(self.mst.tree)
+            ends = {}
+            for edge in self.mst.tree:
+                for pellet in edge[1:]:
+                    ends[pellet] = None if pellet in ends else edge[0]
+            ends = [(pellet, weight - length) for pellet, length in ends.items()
+                    if length is not None] or [(pellet, 0) for pellet in food]
+            self.target = min(sorted(ends), key=lambda end: distances.distance(pacman_pos, end[0]) +
+                              end[1])[0]
+        target = self.target
+
+        # Take a step along a shortest way to the target
+        distance = distances.distance(pacman_pos, target)
+        towards = [direction for direction in legal
+                   if distances.distance(getNextPosition(pacman_pos, direction), target) < distance]
+        if not towards:
+            towards = legal
+        return api.makeMove(random.choice(towards), legal)